@@ -4,9 +4,12 @@ This manages the sidebar components of a Streamlit application. It includes meth
 uploading files, and managing chat sessions.
 """
 
+import functools
 import json
 import os
 import uuid
+from collections import deque
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
@@ -17,12 +20,16 @@ EMPTY_CHAT_NAME = 'Empty chat'
 NUM_CHAT_IN_RECENT = 3
 DEFAULT_BASE_URL = 'http://localhost:8000/'
 
-if Path('deployment_metadata.json').exists():
-    with Path('deployment_metadata.json').open() as f:
-        DEFAULT_REMOTE_AGENT_ENGINE_ID = json.load(f)['remote_agent_engine_id']
 DEFAULT_AGENT_CALLABLE_PATH = 'app.agent_engine_app.AgentEngineApp'
 
 
+@functools.cache
+def get_deployment_metadata() -> dict[str, Any]:
+    """Get the deployment metadata, read once per process and empty when the file is missing."""
+    metadata_file = Path('deployment_metadata.json')
+    return json.loads(metadata_file.read_bytes()) if metadata_file.is_file() else {}
+
+
 class SideBar:
     """Manages the sidebar components of the Streamlit application."""
 
@@ -63,9 +70,10 @@ class SideBar:
             self.url_input_field = None
             self.should_authenticate_request = False
         elif use_agent_path == 'Remote Agent Engine ID':
+            default_engine_id = get_deployment_metadata().get('remote_agent_engine_id', '')
             self.remote_agent_engine_id = self.st.text_input(label='Remote Agent Engine ID',
                                                              value=os.environ.get('REMOTE_AGENT_ENGINE_ID',
-                                                                                  DEFAULT_REMOTE_AGENT_ENGINE_ID))
+                                                                                  default_engine_id))
             self.agent_callable_path = None
             self.url_input_field = None
             self.should_authenticate_request = False
@@ -97,45 +105,68 @@ class SideBar:
 
     def _create_new_chat(self) -> None:
         """Create a new chat session."""
-        if (len(self.st.session_state.user_chats[self.st.session_state['session_id']]['messages']) > 0):
-            self.st.session_state.run_id = None
-            self.st.session_state['session_id'] = str(uuid.uuid4())
-            self.st.session_state.session_db.get_session(session_id=self.st.session_state['session_id'])
-            self.st.session_state.user_chats[self.st.session_state['session_id']] = {'title': EMPTY_CHAT_NAME,
-                                                                                     'messages': []}
+        # session_state goes through a validating proxy, so look entries up once per click.
+        ss = self.st.session_state
+        chats = ss.user_chats
+        if len(chats[ss['session_id']]['messages']) > 0:
+            chat_order = self._get_chat_order()
+            ss.run_id = None
+            sid = str(uuid.uuid4())
+            ss['session_id'] = sid
+            ss.session_db.get_session(session_id=sid)
+            chats[sid] = {'title': EMPTY_CHAT_NAME, 'messages': []}
+            chat_order.append(sid)
 
     def _delete_chat(self) -> None:
         """Delete the current chat session."""
-        self.st.session_state.run_id = None
-        self.st.session_state.session_db.clear()
-        self.st.session_state.user_chats.pop(self.st.session_state['session_id'])
-        if len(self.st.session_state.user_chats) > 0:
-            chat_id = next(iter(self.st.session_state.user_chats.keys()))
-            self.st.session_state['session_id'] = chat_id
-            self.st.session_state.session_db.get_session(session_id=self.st.session_state['session_id'])
+        ss = self.st.session_state
+        sid = ss['session_id']
+        chats = ss.user_chats
+        session_db = ss.session_db
+        chat_order = self._get_chat_order()
+        ss.run_id = None
+        session_db.clear()
+        chats.pop(sid)
+        chat_order.remove(sid)
+        if len(chats) > 0:
+            sid = next(iter(chats))
+            ss['session_id'] = sid
+            session_db.get_session(session_id=sid)
         else:
-            self.st.session_state['session_id'] = str(uuid.uuid4())
-            self.st.session_state.user_chats[self.st.session_state['session_id']] = {'title': EMPTY_CHAT_NAME,
-                                                                                     'messages': []}
+            sid = str(uuid.uuid4())
+            ss['session_id'] = sid
+            chats[sid] = {'title': EMPTY_CHAT_NAME, 'messages': []}
+            chat_order.append(sid)
+
+    def _get_chat_order(self) -> deque[str]:
+        """Get the chat ids in creation order, kept in session state across reruns.
+
+        The order is seeded from ``user_chats`` on first use, so callers that change the chats must fetch it first.
+        """
+        if 'chat_order' not in self.st.session_state:
+            self.st.session_state['chat_order'] = deque(self.st.session_state.user_chats)
+        return self.st.session_state['chat_order']
 
     def _render_recent_chats(self) -> None:
         """Render the recent chats section."""
         self.st.subheader('Recent')  # Style the heading
-        all_chats = list(reversed(self.st.session_state.user_chats.items()))
-        for chat_id, chat in all_chats[:NUM_CHAT_IN_RECENT]:
-            if self.st.button(chat['title'], key=chat_id):
+        user_chats = self.st.session_state.user_chats
+        chat_order = self._get_chat_order()
+        for chat_id in islice(reversed(chat_order), NUM_CHAT_IN_RECENT):
+            if self.st.button(user_chats[chat_id]['title'], key=chat_id):
                 self._switch_chat(chat_id)
 
         with self.st.expander('Other chats'):
-            for chat_id, chat in all_chats[NUM_CHAT_IN_RECENT:]:
-                if self.st.button(chat['title'], key=chat_id):
+            for chat_id in islice(reversed(chat_order), NUM_CHAT_IN_RECENT, None):
+                if self.st.button(user_chats[chat_id]['title'], key=chat_id):
                     self._switch_chat(chat_id)
 
     def _switch_chat(self, chat_id: str) -> None:
         """Switch to a different chat session."""
-        self.st.session_state.run_id = None
-        self.st.session_state['session_id'] = chat_id
-        self.st.session_state.session_db.get_session(session_id=self.st.session_state['session_id'])
+        ss = self.st.session_state
+        ss.run_id = None
+        ss['session_id'] = chat_id
+        ss.session_db.get_session(session_id=chat_id)
 
     def _render_file_upload_section(self) -> None:
         """Render the file upload section."""
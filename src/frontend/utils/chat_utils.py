@@ -3,48 +3,48 @@
 from pathlib import Path
 from typing import Any
 
-import yaml
+import orjson
 
 SAVED_CHAT_PATH = str(Path.cwd()) + '/.saved_chats'
 
 
 def clean_text(text: str) -> str:
-    """Preprocess the input text by removing leading and trailing newlines."""
+    """Preprocess the input text by removing one leading and one trailing newline."""
     if not text:
         return text
 
-    text = text.removeprefix('\n')
-    return text.removesuffix('\n')
+    starts_with_newline = text[0] == '\n'
+    ends_with_newline = text[-1] == '\n'
+    if not (starts_with_newline or ends_with_newline):
+        return text
+    # A single slice allocates one new string, and only when there is something to remove.
+    return text[starts_with_newline:len(text) - ends_with_newline]
 
 
 def sanitize_messages(messages: list[dict[str, str | list[dict[str, str]]]],
                       ) -> list[dict[str, str | list[dict[str, str]]]]:
     """Preprocess and fix the content of messages."""
     for message in messages:
-        if isinstance(message['content'], list):
-            for part in message['content']:
+        content = message['content']
+        if isinstance(content, list):
+            for part in content:
                 if part['type'] == 'text':
                     part['text'] = clean_text(part['text'])
         else:
-            message['content'] = clean_text(message['content'])
+            message['content'] = clean_text(content)
     return messages
 
 
 def save_chat(st: Any) -> None:  # noqa: ANN401
-    """Save the current chat session to a YAML file."""
+    """Save the current chat session to a JSON file."""
     Path(SAVED_CHAT_PATH).mkdir(parents=True, exist_ok=True)
     session_id = st.session_state['session_id']
     session = st.session_state.user_chats[session_id]
     messages = session.get('messages', [])
     if len(messages) > 0:
         session['messages'] = sanitize_messages(session['messages'])
-        filename = f'{session_id}.yaml'
-        with open(Path(SAVED_CHAT_PATH) / filename, 'w') as file:  # noqa: PTH123
-            yaml.dump(
-                [session],
-                file,
-                allow_unicode=True,
-                default_flow_style=False,
-                encoding='utf-8',
-            )
+        filename = f'{session_id}.json'
+        with open(Path(SAVED_CHAT_PATH) / filename, 'wb') as file:  # noqa: PTH123
+            # One compact line per saved chat (NDJSON); indentation only inflates the file and the write.
+            file.write(orjson.dumps([session], option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS))
         st.toast(f'Chat saved to path: ↓ {Path(SAVED_CHAT_PATH) / filename}')
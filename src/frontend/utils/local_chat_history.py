@@ -1,12 +1,30 @@
 """This module provides a class for managing local chat message history."""
 
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
+import orjson
 import yaml
 from langchain_core.chat_history import BaseChatMessageHistory
 
-from frontend.utils.title_summary import chain_title
+from frontend.utils.title_summary import get_title_chain
+
+SESSION_EXT = '.json'
+# Sessions saved before the switch to JSON are still read, but never written.
+LEGACY_SESSION_EXT = '.yaml'
+# Parsing is I/O and C-extension bound, so files can be loaded concurrently.
+LOAD_MAX_WORKERS = 16
+# Prefer the libyaml C parser when PyYAML was built with it.
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+# Message types passed to the title chain; tool calls and results are left out.
+_TITLE_MESSAGE_TYPES = frozenset(('ai', 'human'))
+
+# Title generations in flight, keyed by session file, so concurrent reruns share one LLM call.
+_titles_in_flight: dict[Path, threading.Event] = {}
+_titles_in_flight_lock = threading.Lock()
 
 
 class LocalChatMessageHistory(BaseChatMessageHistory):
@@ -26,46 +44,56 @@ class LocalChatMessageHistory(BaseChatMessageHistory):
         self.user_id = user_id
         self.session_id = session_id
         self.base_dir = base_dir
-        self.user_dir = os.path.join(self.base_dir, self.user_id)  # noqa: PTH118
-        self.session_file = os.path.join(self.user_dir, f'{session_id}.yaml')  # noqa: PTH118
+        self.user_dir = Path(self.base_dir, self.user_id)
+        self.session_file = self.user_dir / f'{session_id}{SESSION_EXT}'
 
-        os.makedirs(self.user_dir, exist_ok=True)  # noqa: PTH103
+        self.user_dir.mkdir(parents=True, exist_ok=True)
 
     def get_session(self, session_id: str) -> None:
         """Updates the session ID and file path for the current session."""
         self.session_id = session_id
-        self.session_file = os.path.join(self.user_dir, f'{session_id}.yaml')  # noqa: PTH118
+        self.session_file = self.user_dir / f'{session_id}{SESSION_EXT}'
 
     def get_all_conversations(self) -> dict[str, dict]:
         """Retrieves all conversations for the current user."""
-        conversations = {}
-        for filename in os.listdir(self.user_dir):  # noqa: PTH208
-            if filename.endswith('.yaml'):
-                file_path = os.path.join(self.user_dir, filename)  # noqa: PTH118
-                with open(file_path) as f:  # noqa: PTH123
-                    conversation = yaml.safe_load(f)
-                    if not isinstance(conversation, list) or len(conversation) > 1:
-                        msg = (f"""Invalid format in {file_path}.
-                                YAML file can only contain one conversation with the following structure.
-                                - messages:
-                                    - content: [message text]
-                                    - type: (human or ai)""")
-                        raise ValueError(msg)
-                    conversation = conversation[0]
-                    if 'title' not in conversation:
-                        conversation['title'] = filename
-                conversations[filename[:-5]] = conversation
-        return dict(sorted(conversations.items(), key=lambda x: x[1].get('update_time', '')))
+        with os.scandir(self.user_dir) as entries:
+            # DirEntry caches the file type from the directory listing, so filtering costs no extra stat.
+            files = [entry for entry in entries
+                     if entry.is_file() and entry.name.endswith((SESSION_EXT, LEGACY_SESSION_EXT))]
+        # A JSON rewrite of a session takes precedence over its legacy copy.
+        json_stems = {Path(entry.name).stem for entry in files if entry.name.endswith(SESSION_EXT)}
+        files = [entry for entry in files
+                 if entry.name.endswith(SESSION_EXT) or Path(entry.name).stem not in json_stems]
+        with ThreadPoolExecutor(max_workers=LOAD_MAX_WORKERS) as executor:
+            conversations = zip((Path(entry.name).stem for entry in files),
+                                executor.map(self._load_conversation, files),
+                                strict=True)
+            return dict(sorted(conversations, key=lambda x: x[1].get('update_time', '')))
+
+    @staticmethod
+    def _load_conversation(path: str | os.PathLike) -> dict:
+        """Loads a single conversation from a session file."""
+        path = Path(path)
+        with path.open('rb') as f:
+            conversation = (orjson.loads(f.read()) if path.suffix == SESSION_EXT
+                            else yaml.load(f, Loader=YamlLoader))  # noqa: S506
+        if not isinstance(conversation, list) or len(conversation) > 1:
+            msg = (f"""Invalid format in {path}.
+                    Session file can only contain one conversation with the following structure.
+                    - messages:
+                        - content: [message text]
+                        - type: (human or ai)""")
+            raise ValueError(msg)
+        conversation = conversation[0]
+        if 'title' not in conversation:
+            conversation['title'] = path.name
+        return conversation
 
     def upsert_session(self, session: dict) -> None:
         """Updates or inserts a session into the local storage."""
         session['update_time'] = datetime.now().isoformat()  # noqa: DTZ005
-        with open(self.session_file, 'w') as f:  # noqa: PTH123
-            yaml.dump([session],
-                      f,
-                      allow_unicode=True,
-                      default_flow_style=False,
-                      encoding='utf-8')
+        self.session_file.write_bytes(orjson.dumps([session],
+                                                   option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS))
 
     def set_title(self, session: dict) -> None:
         """Set the title for the given session.
@@ -73,7 +101,9 @@ class LocalChatMessageHistory(BaseChatMessageHistory):
         This method generates a title for the session based on its messages.
         If the session has messages, it appends a special message to prompt
         for title creation, generates the title using a title chain, and
-        updates the session with the new title.
+        updates the session with the new title. If a title is already being
+        generated for the same session file, it waits for that call and reads
+        the resulting title from disk instead of calling the LLM again.
 
         Args:
             session (dict): A dictionary containing session information,
@@ -83,17 +113,33 @@ class LocalChatMessageHistory(BaseChatMessageHistory):
             None
         """
         if session['messages']:
-            messages = session['messages'] + [{'type': 'human',
-                                               'content': 'End of conversation - Create one single title'}]
-            # Remove the tool calls from conversation
-            messages = [msg for msg in messages if msg['type'] in ('ai', 'human') and isinstance(msg['content'], str)]
-
-            response = chain_title.invoke(messages)
-            title = (response.content.strip() if isinstance(response.content, str) else str(response.content))
-            session['title'] = title
-            self.upsert_session(session)
+            session_file = self.session_file
+            with _titles_in_flight_lock:
+                in_flight = _titles_in_flight.get(session_file)
+                if in_flight is None:
+                    _titles_in_flight[session_file] = threading.Event()
+
+            if in_flight is not None:
+                in_flight.wait()
+                if session_file.exists():
+                    session['title'] = self._load_conversation(session_file)['title']
+                return
+
+            try:
+                # Remove the tool calls from conversation
+                messages = [msg for msg in session['messages']
+                            if msg['type'] in _TITLE_MESSAGE_TYPES and isinstance(msg['content'], str)]
+                messages.append({'type': 'human', 'content': 'End of conversation - Create one single title'})
+
+                response = get_title_chain().invoke(messages)
+                title = (response.content.strip() if isinstance(response.content, str) else str(response.content))
+                session['title'] = title
+                self.upsert_session(session)
+            finally:
+                with _titles_in_flight_lock:
+                    _titles_in_flight.pop(session_file).set()
 
     def clear(self) -> None:
-        """Removes the current session file if it exists."""
-        if os.path.exists(self.session_file):  # noqa: PTH110
-            os.remove(self.session_file)  # noqa: PTH107
+        """Removes the current session file, and any legacy copy of it, if it exists."""
+        self.session_file.unlink(missing_ok=True)
+        self.session_file.with_suffix(LEGACY_SESSION_EXT).unlink(missing_ok=True)
@@ -1,7 +1,6 @@
 """This module provides a client for streaming events from a server and a stream handler for updating a Streamlit."""
 
 import importlib
-import json
 import uuid
 from collections.abc import Generator
 from typing import Any
@@ -10,6 +9,7 @@ from urllib.parse import urljoin
 import google.auth
 import google.auth.transport.requests
 import google.oauth2.id_token
+import orjson
 import requests
 import streamlit as st
 import vertexai
@@ -124,7 +124,7 @@ class Client:
             headers = {'Content-Type': 'application/json'}
             if self.authenticate_request:
                 headers['Authorization'] = f'Bearer {self.id_token}'
-            requests.post(url, data=json.dumps(feedback_dict), headers=headers, timeout=10)
+            requests.post(url, data=orjson.dumps(feedback_dict), headers=headers, timeout=10)
         elif self.agent is not None:
             self.agent.register_feedback(feedback=feedback_dict)
         else:
@@ -135,16 +135,17 @@ class Client:
         """Stream events from the server, yielding parsed event data."""
         if self.url:
             headers = {'Content-Type': 'application/json',
-                       'Accept': 'text/event-stream'}
+                       'Accept': 'application/x-ndjson'}
             if self.authenticate_request:
                 headers['Authorization'] = f'Bearer {self.id_token}'
             with requests.post(self.url, json=data, headers=headers, stream=True, timeout=60) as response:
                 for line in response.iter_lines():
                     if line:
                         try:
-                            event = json.loads(line.decode('utf-8'))
+                            # orjson parses the raw bytes, so the line is not decoded to str first.
+                            event = orjson.loads(line)
                             yield event
-                        except json.JSONDecodeError:
+                        except orjson.JSONDecodeError:
                             logger.error(f"Failed to parse event: {line.decode('utf-8')}")
         elif self.agent is not None:
             yield from self.agent.stream_query(**data)
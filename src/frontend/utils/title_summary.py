@@ -4,6 +4,7 @@ import os
 from typing import Any
 
 import google.auth
+import streamlit as st
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_google_vertexai import ChatVertexAI
@@ -59,24 +60,37 @@ title_template = ChatPromptTemplate.from_messages([
 
      """),
     MessagesPlaceholder(variable_name='messages')])
-try:
-    # Initialize Vertex AI with default project credentials
-    _, project_id = google.auth.default()
-
-    llm = ChatVertexAI(model_name='gemini-2.0-flash-001',
-                       temperature=0,
-                       project=project_id,
-                       location=os.getenv('LOCATION', 'us-central1'))
-    chain_title = title_template | llm
-
-except Exception:  # noqa: BLE001
-    # Fallback to a simple title generator when Vertex AI is unavailable
-    logger.warning('WARNING: Failed to initialize Vertex AI. Using dummy LLM instead.')
-
-    class DummyChain:
-        """Dummy chain to simulate Vertex AI behavior."""
-        def invoke(*args: Any, **kwargs: Any) -> AIMessage:  # noqa: ANN401, ARG002
-            """Simulate a title generation."""
-            return AIMessage(content='conversation')
-
-    chain_title = DummyChain()
+
+
+class DummyChain:
+    """Dummy chain to simulate Vertex AI behavior."""
+    def invoke(*args: Any, **kwargs: Any) -> AIMessage:  # noqa: ANN401, ARG002
+        """Simulate a title generation."""
+        return AIMessage(content='conversation')
+
+
+@st.cache_resource
+def get_title_chain() -> Any:  # noqa: ANN401
+    """Get the cached title generation chain, built once per process."""
+    try:
+        # Initialize Vertex AI with default project credentials
+        _, project_id = google.auth.default()
+
+        llm = ChatVertexAI(model_name='gemini-2.0-flash-001',
+                           temperature=0,
+                           project=project_id,
+                           location=os.getenv('LOCATION', 'us-central1'))
+        return title_template | llm
+
+    except Exception:  # noqa: BLE001
+        # Fallback to a simple title generator when Vertex AI is unavailable
+        logger.warning('WARNING: Failed to initialize Vertex AI. Using dummy LLM instead.')
+        return DummyChain()
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Resolve the legacy ``chain_title`` attribute lazily through the cached factory."""
+    if name == 'chain_title':
+        return get_title_chain()
+    msg = f'module {__name__!r} has no attribute {name!r}'
+    raise AttributeError(msg)
@@ -1,55 +1,75 @@
 """Main agent code."""
 
+import functools
+from typing import TYPE_CHECKING, Any
+
 from conf.config import conf
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_google_vertexai import ChatVertexAI
 from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.prebuilt import ToolNode
 
-from ibis_crew_ai.crew.crew import DevCrew
+if TYPE_CHECKING:
+    from langchain_google_vertexai import ChatVertexAI
+
+# Built once as a message object, so the model does not convert a dict into a SystemMessage on every turn.
+_SYSTEM_MSG = SystemMessage(content=("You are an expert Lead Software Engineer Manager.\n"
+                                     "Your role is to speak to a user and understand what kind of code they need to "
+                                     "build.\n"
+                                     "Part of your task is therefore to gather requirements and clarifying ambiguity "
+                                     "by asking followup questions. Don't ask all the questions together as the user "
+                                     "has a low attention span, rather ask a question at the time.\n"
+                                     "Once the problem to solve is clear, you will call your tool for writing the "
+                                     "solution.\n"
+                                     "Remember, you are an expert in understanding requirements but you cannot code, "
+                                     "use your coding tool to generate a solution. Keep the test cases if any, they "
+                                     "are useful for the user."))
 
 
 @tool
 def coding_tool(code_instructions: str) -> str:
     """Use this tool to write a python program given a set of requirements and or instructions."""
+    # crewai is slow to import, so it is only loaded once the crew is actually needed.
+    from ibis_crew_ai.crew.crew import DevCrew  # noqa: PLC0415
+
     inputs = {'code_instructions': code_instructions}
     return DevCrew().crew().kickoff(inputs=inputs)
 
 
-def initialize_llm() -> ChatVertexAI:
-    """Initializes and returns the language model."""
-    return ChatVertexAI(model=conf['LLM'],
-                        location=conf['LOCATION'],
+@functools.lru_cache(maxsize=4)
+def _get_llm(model: str, location: str) -> 'ChatVertexAI':
+    """Creates the language model once per model and location, so its client and channel are reused."""
+    # Imported on first use to keep the Vertex AI SDK off the server's startup path.
+    from langchain_google_vertexai import ChatVertexAI  # noqa: PLC0415
+
+    return ChatVertexAI(model=model,
+                        location=location,
                         temperature=0,
                         max_tokens=4096,
                         streaming=True)
 
 
+def initialize_llm() -> 'ChatVertexAI':
+    """Initializes and returns the language model."""
+    return _get_llm(conf['LLM'], conf['LOCATION'])
+
+
+def warm_up_llm() -> None:
+    """Creates the language model and its prediction client ahead of the first request."""
+    initialize_llm().prediction_client  # noqa: B018
+
+
 def should_continue(state: MessagesState) -> str:
     """Determines whether to use the crew or end the conversation."""
     last_message = state['messages'][-1]
     return 'dev_crew' if last_message.tool_calls else END
 
 
-def call_model(state: MessagesState, config: RunnableConfig, llm: ChatVertexAI) -> dict[str, BaseMessage]:
+def call_model(state: MessagesState, config: RunnableConfig, llm: 'ChatVertexAI') -> dict[str, BaseMessage]:
     """Calls the language model and returns the response."""
-    system_message = ("You are an expert Lead Software Engineer Manager.\n"
-                      "Your role is to speak to a user and understand what kind of code they need to "
-                      "build.\n"
-                      "Part of your task is therefore to gather requirements and clarifying ambiguity "
-                      "by asking followup questions. Don't ask all the questions together as the user "
-                      "has a low attention span, rather ask a question at the time.\n"
-                      "Once the problem to solve is clear, you will call your tool for writing the "
-                      "solution.\n"
-                      "Remember, you are an expert in understanding requirements but you cannot code, "
-                      "use your coding tool to generate a solution. Keep the test cases if any, they "
-                      "are useful for the user.")
-
-    messages_with_system = [{'type': 'system', 'content': system_message}] + state['messages']
     # Forward the RunnableConfig object to ensure the agent is capable of streaming the response.
-    response = llm.invoke(messages_with_system, config)
+    response = llm.invoke([_SYSTEM_MSG, *state['messages']], config)
     return {'messages': response}
 
 
@@ -74,5 +94,15 @@ def agent_workflow() -> StateGraph:
     return workflow.compile()
 
 
-if __name__ == '__main__':
-    agent = agent_workflow()
+@functools.cache
+def get_agent() -> StateGraph:
+    """Returns the compiled agent workflow, built once per process and shared across requests."""
+    return agent_workflow()
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Resolve the ``agent`` attribute lazily through the cached factory."""
+    if name == 'agent':
+        return get_agent()
+    msg = f'module {__name__!r} has no attribute {name!r}'
+    raise AttributeError(msg)
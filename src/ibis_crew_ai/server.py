@@ -1,51 +1,79 @@
 """API server using fast api."""
 
 import os
-from collections.abc import Generator
+import threading
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse, StreamingResponse
-from google.cloud import logging as google_cloud_logging
 from langchain_core.runnables import RunnableConfig
 from loguru import logger  # Import loguru logger
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from traceloop.sdk import Instruments, Traceloop
 
-from ibis_crew_ai.agent import agent_workflow
+from ibis_crew_ai.agent import get_agent, warm_up_llm
+from ibis_crew_ai.utils.logging_setup import get_logging_client, install_cloud_logging_sink
 from ibis_crew_ai.utils.tracing import CloudTraceLoggingSpanExporter
 from ibis_crew_ai.utils.typing import Feedback, InputChat, Request, dumps, ensure_valid_config
 
-# Initialize FastAPI app and logging
-app = FastAPI(title='ibis-crew-ai',
-              description='API for interacting with the Agent ibis-crew-ai')
 
-# Initialize Google Cloud Logging
-logging_client = google_cloud_logging.Client()
-gcloud_logger = logging_client.logger(__name__)
+def warm_up() -> None:
+    """Warms up the language model client and compiles the agent so the first request does not pay for either."""
+    try:
+        warm_up_llm()
+        get_agent()
+    except Exception as e:  # noqa: BLE001
+        logger.warning('Failed to warm up the agent: {}', e)
 
-# Add a custom sink to forward loguru logs to Google Cloud Logging
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
+    """Starts the warm up in the background so it does not delay server startup."""
+    threading.Thread(target=warm_up, daemon=True).start()
+    yield
 
-class GoogleCloudSink:
-    """Custom sink to forward loguru logs to Google Cloud Logging."""
 
-    def write(self, message: str) -> None:
-        """Write a log message to Google Cloud Logging."""
-        record = message.strip()
-        gcloud_logger.log_text(record)
+# Initialize FastAPI app and logging
+app = FastAPI(title='ibis-crew-ai',
+              description='API for interacting with the Agent ibis-crew-ai',
+              lifespan=lifespan)
 
+install_cloud_logging_sink(__name__)  # Forward loguru logs to Google Cloud Logging
 
-logger.add(GoogleCloudSink(), level='INFO')  # Forward loguru logs to Google Cloud Logging
+# Events are streamed as newline-delimited JSON: one serialized event per line.
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+_NEWLINE = b'\n'
+
+COMMIT_SHA = os.environ.get('COMMIT_SHA', 'None')
+
+# Request metadata sent to Traceloop as association properties and left out of the metadata passed to the agent.
+_TRACING_METADATA_KEYS = frozenset({'user_id', 'session_id'})
+
+# Set once Traceloop.init succeeds; until then there is nothing to associate request properties with.
+_traceloop_ready = False
 
 
 def initialize_telemetry() -> None:
     """Initializes Traceloop Telemetry."""
+    global _traceloop_ready  # noqa: PLW0603
     # Keep the initialization logic, but in a function
     try:
         logger.info('Attempting to initialize Traceloop Telemetry...')
+        # Export spans from a background batch so requests never wait on Cloud Trace/Logging calls,
+        # including in notebook environments where Traceloop would otherwise export synchronously.
+        span_processor = BatchSpanProcessor(CloudTraceLoggingSpanExporter(logging_client=get_logging_client()),
+                                            max_queue_size=2048,
+                                            schedule_delay_millis=5000,
+                                            max_export_batch_size=512)
+        # Traceloop only skips its own metrics and logs exporters when given an exporter, not a processor; unless
+        # configured otherwise it would send metrics to api.traceloop.com. By default only spans are exported.
+        os.environ.setdefault('TRACELOOP_METRICS_ENABLED', 'false')
+        os.environ.setdefault('TRACELOOP_LOGGING_ENABLED', 'false')
         Traceloop.init(app_name=app.title,
-                       disable_batch=False,  # Consider disable_batch=True for tests if preferred
-                       exporter=CloudTraceLoggingSpanExporter(),
+                       processor=span_processor,
                        instruments={Instruments.LANGCHAIN, Instruments.CREW})
+        _traceloop_ready = True
         logger.info('Traceloop Telemetry initialized successfully.')
     except ImportError as e:
         logger.warning('Traceloop or dependencies not fully installed. Skipping Telemetry init: {}', e)
@@ -61,34 +89,48 @@ def set_tracing_properties(config: RunnableConfig) -> None:
     Args:
         config: Optional RunnableConfig containing request metadata
     """
+    if not _traceloop_ready:
+        return
+    # Built with non-raising lookups, so only the Traceloop call itself can fail.
+    metadata = config.get('metadata') or {}
+    properties = {'log_type': 'tracing',
+                  'run_id': str(config['run_id']),
+                  'user_id': metadata.get('user_id', 'None'),
+                  'session_id': metadata.get('session_id', 'None'),
+                  'commit_sha': COMMIT_SHA}
     try:
-        # Check if Traceloop is initialized/available before using it
-        Traceloop.set_association_properties({'log_type': 'tracing',
-                                              'run_id': str(config.get('run_id', 'None')),
-                                              'user_id': config['metadata'].pop('user_id', 'None'),
-                                              'session_id': config['metadata'].pop('session_id', 'None'),
-                                              'commit_sha': os.environ.get('COMMIT_SHA', 'None')})
-    except Exception as e:  # noqa: BLE001
+        Traceloop.set_association_properties(properties)
+    except (AttributeError, RuntimeError) as e:
         logger.error('Error setting tracing properties: {}', e)
 
 
-def stream_messages(input_msg: InputChat,
-                    config: RunnableConfig | None = None) -> Generator[str, None, None]:
+async def stream_messages(input_msg: InputChat,
+                          config: RunnableConfig | None = None) -> AsyncGenerator[bytes, None]:
     """Stream events in response to an input chat.
 
+    Being an async generator, the events are yielded on the event loop, so StreamingResponse does not have to
+    hop to a worker thread for every chunk.
+
     Args:
         input_msg: The input chat messages
         config: Optional configuration for the runnable
 
     Yields:
-        JSON serialized event data
+        JSON serialized event data, one newline-terminated line per event
     """
     config = ensure_valid_config(config=config)
     set_tracing_properties(config)
-    input_dict = input_msg.model_dump()
-    agent = agent_workflow()
-    for data in agent.stream(input_dict, config=config, stream_mode='messages'):
-        yield dumps(data) + '\n'
+    # Keep the identifiers out of the run metadata, which is repeated in every streamed event.
+    # The config gets a filtered copy, so the caller's metadata dict is not changed.
+    metadata = config['metadata']
+    if not _TRACING_METADATA_KEYS.isdisjoint(metadata):
+        config = {**config,
+                  'metadata': {key: value for key, value in metadata.items() if key not in _TRACING_METADATA_KEYS}}
+    # The messages are already validated LangChain objects, so pass them to the graph as they are
+    # rather than dumping them to dicts that the graph would convert straight back into messages.
+    input_dict = dict(input_msg)
+    async for data in get_agent().astream(input_dict, config=config, stream_mode='messages'):
+        yield dumps(data) + _NEWLINE
 
 
 # Routes
@@ -108,7 +150,8 @@ def collect_feedback(feedback: Feedback) -> dict[str, str]:
     Returns:
         Success message
     """
-    logger.info('Feedback received: {}', feedback.model_dump())
+    # model_dump_json serializes in pydantic-core directly and logs JSON rather than a Python dict repr.
+    logger.info('Feedback received: {}', feedback.model_dump_json())
     return {'status': 'success'}
 
 
@@ -122,9 +165,12 @@ def stream_chat_events(request: Request) -> StreamingResponse:
     Returns:
         Streaming response of chat events
     """
-    logger.info('Streaming chat events for session: {}', request.config.get('session_id', 'unknown'))
+    # Bound values are sent as Cloud Logging labels, which are indexed without parsing the message text.
+    # Clients send the session id in the config metadata, next to the user id.
+    metadata = (request.config or {}).get('metadata') or {}
+    logger.bind(session_id=metadata.get('session_id', 'unknown')).info('Streaming chat events')
     return StreamingResponse(stream_messages(input_msg=request.input, config=request.config),
-                             media_type='text/event-stream')
+                             media_type=NDJSON_MEDIA_TYPE)
 
 
 # Main execution
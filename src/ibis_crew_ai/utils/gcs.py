@@ -1,27 +1,20 @@
 """Utility functions for Google Cloud Storage (GCS) operations."""
 
+import functools
+
 from google.api_core import exceptions
-from google.cloud import logging as google_cloud_logging
 from google.cloud import storage
 from loguru import logger
 
-# Initialize Google Cloud Logging
-logging_client = google_cloud_logging.Client()
-gcloud_logger = logging_client.logger(__name__)
-
-# Add a custom sink to forward loguru logs to Google Cloud Logging
-
-
-class GoogleCloudSink:
-    """Custom sink to forward loguru logs to Google Cloud Logging."""
+from ibis_crew_ai.utils.logging_setup import install_cloud_logging_sink
 
-    def write(self, message: str) -> None:
-        """Write a log message to Google Cloud Logging."""
-        record = message.strip()
-        gcloud_logger.log_text(record)
+install_cloud_logging_sink(__name__)  # Forward loguru logs to Google Cloud Logging
 
 
-logger.add(GoogleCloudSink(), level='INFO')  # Forward loguru logs to Google Cloud Logging
+@functools.lru_cache(maxsize=8)
+def _client_for(project: str) -> storage.Client:
+    """Returns a storage client for the project, created once so its credentials and session are reused."""
+    return storage.Client(project=project)
 
 
 def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -> None:
@@ -32,7 +25,7 @@ def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -
         project: Google Cloud project ID
         location: Location to create the bucket in (defaults to us-central1)
     """
-    storage_client = storage.Client(project=project)
+    storage_client = _client_for(project)
 
     bucket_name = bucket_name.removeprefix('gs://')
     try:
@@ -0,0 +1,46 @@
+"""Shared Google Cloud Logging client and the loguru sink that forwards to it."""
+
+import functools
+import logging
+import os
+
+from google.cloud import logging as google_cloud_logging
+from google.cloud.logging.handlers import CloudLoggingHandler
+from google.cloud.logging.handlers.transports import BackgroundThreadTransport
+from loguru import logger
+
+# Entries are queued and sent in batches from a background thread, so logging never waits on a Cloud Logging call.
+_BatchedTransport = functools.partial(BackgroundThreadTransport, batch_size=100, grace_period=5.0)
+
+_sink_installed = False
+
+
+def _extra_as_labels(record: logging.LogRecord) -> bool:
+    """Exposes the values bound with loguru's ``logger.bind`` as Cloud Logging labels."""
+    extra = getattr(record, 'extra', None)
+    if extra:
+        record.labels = {key: str(value) for key, value in extra.items()}
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def get_logging_client() -> google_cloud_logging.Client:
+    """Returns the process-wide Google Cloud Logging client, created on first use."""
+    return google_cloud_logging.Client()
+
+
+def install_cloud_logging_sink(log_name: str) -> None:
+    """Forwards loguru logs to Google Cloud Logging, adding the sink only once per process.
+
+    The minimum forwarded level is read from the ``LOG_LEVEL`` environment variable and defaults to INFO.
+
+    Args:
+        log_name (str): Name of the Cloud Logging log to write to. Only the first call's name is used.
+    """
+    global _sink_installed  # noqa: PLW0603
+    if not _sink_installed:
+        handler = CloudLoggingHandler(get_logging_client(), name=log_name, transport=_BatchedTransport)
+        # Must run before the handler's own filter, which is what turns ``record.labels`` into entry labels.
+        handler.filters.insert(0, _extra_as_labels)
+        logger.add(handler, level=os.environ.get('LOG_LEVEL', 'INFO'))
+        _sink_installed = True
@@ -5,16 +5,75 @@ and handle large attribute values by storing them in Google Cloud Storage.
 It is designed to work with the Google Cloud Python client libraries and OpenTelemetry SDK.
 """
 
-import json
-from collections.abc import Sequence
+import functools
+import io
+from collections.abc import Mapping, Sequence
 from typing import Any
 
+import orjson
+from google.api_core import exceptions
 from google.cloud import logging as google_cloud_logging
 from google.cloud import storage
 from loguru import logger
+from opentelemetry import trace
 from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.sdk.util import ns_to_iso_str
+
+# Cloud Logging rejects write requests above 10 MB, so span logs are committed in batches kept below this size.
+_MAX_LOG_BATCH_BYTES = 8 * 1024 * 1024
+# Allowance for the encoded span fields other than its attributes, which are the only part measured exactly.
+_SPAN_LOG_ENTRY_OVERHEAD = 4 * 1024
+
+
+def _format_context(context: trace.SpanContext) -> dict[str, str]:
+    """Formats a span context the way ``ReadableSpan.to_json`` does."""
+    return {'trace_id': f'0x{trace.format_trace_id(context.trace_id)}',
+            'span_id': f'0x{trace.format_span_id(context.span_id)}',
+            'trace_state': repr(context.trace_state)}
+
+
+def _attributes_to_dict(attributes: Mapping[str, Any] | None) -> dict[str, Any] | None:
+    """Copies attributes into a dict, turning the tuples OpenTelemetry stores sequences as into lists.
+
+    Cloud Logging builds protobuf entries from the payload, which accepts lists but rejects tuples.
+    """
+    if attributes is None:
+        return None
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in attributes.items()}
+
+
+def _span_to_dict(span: ReadableSpan) -> dict[str, Any]:
+    """Builds the same dictionary as ``json.loads(span.to_json())`` without encoding and decoding JSON.
+
+    Args:
+        span (ReadableSpan): The span to convert.
+
+    Returns:
+        dict: The span data, with the schema of ``ReadableSpan.to_json``.
+    """
+    status = {'status_code': span.status.status_code.name}
+    if span.status.description:
+        status['description'] = span.status.description
+
+    return {'name': span.name,
+            'context': _format_context(span.context) if span.context else None,
+            'kind': str(span.kind),
+            'parent_id': f'0x{trace.format_span_id(span.parent.span_id)}' if span.parent is not None else None,
+            'start_time': ns_to_iso_str(span.start_time) if span.start_time else None,
+            'end_time': ns_to_iso_str(span.end_time) if span.end_time else None,
+            'status': status,
+            'attributes': _attributes_to_dict(span.attributes),
+            'events': [{'name': event.name,
+                        'timestamp': ns_to_iso_str(event.timestamp),
+                        'attributes': _attributes_to_dict(event.attributes)}
+                       for event in span.events],
+            'links': [{'context': _format_context(link.context),
+                       'attributes': _attributes_to_dict(link.attributes)}
+                      for link in span.links],
+            'resource': {'attributes': _attributes_to_dict(span.resource.attributes),
+                         'schema_url': span.resource.schema_url}}
 
 
 class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
@@ -44,11 +103,35 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         """
         super().__init__(**kwargs)
         self.debug = debug
-        self.logging_client = logging_client or google_cloud_logging.Client(project=self.project_id)
-        self.logger = self.logging_client.logger(__name__)
-        self.storage_client = storage_client or storage.Client(project=self.project_id)
+        # Clients that are not given are created on first use, keeping them off the server's startup path.
+        if logging_client is not None:
+            self.logging_client = logging_client
+        if storage_client is not None:
+            self.storage_client = storage_client
         self.bucket_name = (bucket_name or f'{self.project_id}-ibis-crew-ai-logs-data')
-        self.bucket = self.storage_client.bucket(self.bucket_name)
+        # Constant parts of the per-span trace name and payload URL, built once rather than for every span.
+        self._trace_prefix = f'projects/{self.project_id}/traces/'
+        self._gcs_url_prefix = f'https://storage.mtls.cloud.google.com/{self.bucket_name}/spans/'
+
+    @functools.cached_property
+    def logging_client(self) -> google_cloud_logging.Client:
+        """The Google Cloud Logging client, created on first use when none was given."""
+        return google_cloud_logging.Client(project=self.project_id)
+
+    @functools.cached_property
+    def logger(self) -> google_cloud_logging.Logger:
+        """The Cloud Logging logger the span data is written to."""
+        return self.logging_client.logger(__name__)
+
+    @functools.cached_property
+    def storage_client(self) -> storage.Client:
+        """The Google Cloud Storage client, created on first use when none was given."""
+        return storage.Client(project=self.project_id)
+
+    @functools.cached_property
+    def bucket(self) -> storage.Bucket:
+        """The bucket large attribute payloads are stored in."""
+        return self.storage_client.bucket(self.bucket_name)
 
     def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
         """Export the spans to Google Cloud Logging and Cloud Trace.
@@ -59,37 +142,65 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         Returns:
             SpanExportResult: The result of the export operation.
         """
-        for span in spans:
-            span_context = span.get_span_context()
-            trace_id = format(span_context.trace_id, 'x')
-            span_id = format(span_context.span_id, 'x')
-            span_dict = json.loads(span.to_json())
+        try:
+            # Collect the log entries and write them in as few Cloud Logging calls as the request size limit allows.
+            entries: list[dict] = []
+            entries_size = 0
+            for span in spans:
+                span_context = span.get_span_context()
+                trace_id = f'{span_context.trace_id:x}'
+                span_id = f'{span_context.span_id:x}'
+                span_dict = _span_to_dict(span)
+
+                span_dict['trace'] = self._trace_prefix + trace_id
+                span_dict['span_id'] = span_id
 
-            span_dict['trace'] = f'projects/{self.project_id}/traces/{trace_id}'
-            span_dict['span_id'] = span_id
+                span_dict, attributes_size = self._process_large_attributes(span_dict=span_dict, span_id=span_id)
 
-            span_dict = self._process_large_attributes(span_dict=span_dict, span_id=span_id)
+                if self.debug:
+                    self.logger.debug(span_dict)
 
-            if self.debug:
-                self.logger.debug(span_dict)
+                entry_size = attributes_size + _SPAN_LOG_ENTRY_OVERHEAD
+                if entries and entries_size + entry_size > _MAX_LOG_BATCH_BYTES:
+                    self._write_span_logs(entries)
+                    entries, entries_size = [], 0
+                entries.append(span_dict)
+                entries_size += entry_size
 
-            # Log the span data to Google Cloud Logging
-            self.logger.log_struct(span_dict, severity='INFO')
+            if entries:
+                self._write_span_logs(entries)
+        finally:
+            # Export spans to Google Cloud Trace using the parent class method, even if logging them failed
+            result = super().export(spans)
+        return result
 
-        # Export spans to Google Cloud Trace using the parent class method
-        return super().export(spans)
+    def _write_span_logs(self, entries: list[dict]) -> None:
+        """Log span data to Google Cloud Logging in a single call.
+
+        A failed call is logged and only loses these entries, so the remaining batches and the Cloud Trace export
+        still go ahead.
+
+        Args:
+            entries (list[dict]): The span dictionaries to log.
+        """
+        try:
+            with self.logger.batch() as batch:
+                for entry in entries:
+                    batch.log_struct(entry, severity='INFO')
+        except Exception as e:  # Invalid entries, auth and transport errors alike  # noqa: BLE001
+            logger.error('Failed to write {} span logs to Cloud Logging: {}', len(entries), e)
 
-    def store_in_gcs(self, content: str, span_id: str) -> str:
+    def store_in_gcs(self, content: bytes, span_id: str) -> str:
         """Initiate storing large content in Google Cloud Storage/.
 
         Args:
-            content (str): The content to store.
+            content (bytes): The UTF-8 encoded JSON content to store.
             span_id (str): The ID of the span.
 
         Returns:
             str: The GCS URI of the stored content.
         """
-        if not self.storage_client.bucket(self.bucket_name).exists():
+        if not self._bucket_exists:
             logger.warning('Bucket not found. Unable to store span attributes in GCS.',
                            bucket_name=self.bucket_name)
             return 'GCS bucket not found'
@@ -97,10 +208,26 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         blob_name = f'spans/{span_id}.json'
         blob = self.bucket.blob(blob_name)
 
-        blob.upload_from_string(content, 'application/json')
+        try:
+            # Upload the encoded bytes as they are; the explicit size spares the client seeking to the end.
+            blob.upload_from_file(io.BytesIO(content),
+                                  size=len(content),
+                                  content_type='application/json',
+                                  checksum='crc32c')
+        except exceptions.NotFound:
+            # The bucket was removed after it was first checked, so stop uploading to it.
+            self._bucket_exists = False
+            logger.warning('Bucket not found. Unable to store span attributes in GCS.',
+                           bucket_name=self.bucket_name)
+            return 'GCS bucket not found'
         return f'gs://{self.bucket_name}/{blob_name}'
 
-    def _process_large_attributes(self, span_dict: dict, span_id: str) -> dict:
+    @functools.cached_property
+    def _bucket_exists(self) -> bool:
+        """Whether the payload bucket exists, checked once per exporter instead of before every upload."""
+        return self.bucket.exists()
+
+    def _process_large_attributes(self, span_dict: dict, span_id: str) -> tuple[dict, int]:
         """Process large attribute values by storing them in GCS.
 
         If they exceed the size limit of Google Cloud Logging.
@@ -110,30 +237,25 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
             span_id (str): The span ID.
 
         Returns:
-            dict: The updated span dictionary.
+            tuple: The updated span dictionary and the encoded size of its attributes in bytes.
         """
         attributes = span_dict.get('attributes', {})
-        attributes_size = len(json.dumps(attributes).encode())
+        # Serialize once: the encoded bytes give the size and are also what gets uploaded.
+        attributes_payload = orjson.dumps(attributes)
+        attributes_size = len(attributes_payload)
 
         if attributes_size > 255 * 1024:  # 250 KB
             logger.info(f'Attributes size ({attributes_size} bytes) exceeds 250 KB, '
                         'storing in GCS to avoid large log entry errors.')
 
-            # Separate large payload from other attributes
-            attributes_payload = dict(attributes.items())
-            attributes_retain = dict(attributes.items())
-
             # Store large payload in GCS
-            gcs_uri = self.store_in_gcs(json.dumps(attributes_payload), span_id)
-            attributes_retain['uri_payload'] = gcs_uri
-            attributes_retain['url_payload'] = (
-                f'https://storage.mtls.cloud.google.com/'
-                f'{self.bucket_name}/spans/{span_id}.json'
-            )
-
-            span_dict['attributes'] = attributes_retain
+            gcs_uri = self.store_in_gcs(attributes_payload, span_id)
+            attributes['uri_payload'] = gcs_uri
+            attributes['url_payload'] = f'{self._gcs_url_prefix}{span_id}.json'
+
+            span_dict['attributes'] = attributes
         else:
             logger.debug(f'Attributes size ({attributes_size} bytes) is within the limit, '
                          'no need to store in GCS.')
 
-        return span_dict
+        return span_dict, attributes_size
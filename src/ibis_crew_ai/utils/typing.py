@@ -9,10 +9,11 @@ It is designed to be used in a Python application that requires chat input handl
 feedback collection, and serialization of objects to JSON format.
 """
 
-import json
+import functools
 import uuid
 from typing import Annotated, Any, Literal
 
+import orjson
 from langchain_core.load.serializable import Serializable
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
@@ -56,35 +57,44 @@ def ensure_valid_config(config: RunnableConfig | None) -> RunnableConfig:
     if config is None:
         config = RunnableConfig()
     if config.get('run_id') is None:
+        # Kept as a UUID: LangChain types RunnableConfig.run_id as one, and request configs are validated into it.
         config['run_id'] = uuid.uuid4()
     if config.get('metadata') is None:
         config['metadata'] = {}
     return config
 
 
-def default_serialization(obj: Any) -> Any:  # noqa: ANN401
+@functools.singledispatch
+def default_serialization(obj: Any) -> Any:  # noqa: ANN401, ARG001
     """Default serialization for LangChain objects.
 
-    Converts BaseModel instances to JSON strings.
+    Converts BaseModel instances to JSON strings. Dispatch is on the object's type, so after the
+    first message chunk of a stream the handler is found with a single cached lookup.
     """
-    if isinstance(obj, Serializable):
-        return obj.to_json()
     return None
 
 
-def dumps(obj: Any) -> str:  # noqa: ANN401
-    """Serialize an object to a JSON string.
+@default_serialization.register
+def _serialize_langchain(obj: Serializable) -> Any:  # noqa: ANN401
+    """Serializes LangChain objects into their JSON-ready constructor form."""
+    return obj.to_json()
+
+
+def dumps(obj: Any) -> bytes:  # noqa: ANN401
+    """Serialize an object to UTF-8 encoded JSON.
 
     For LangChain objects (BaseModel instances), it converts them to
-    dictionaries before serialization.
+    dictionaries before serialization. Returning bytes lets streaming
+    responses write the payload without encoding it again.
 
     Args:
         obj: The object to serialize
 
     Returns:
-        JSON string representation of the object
+        JSON bytes representation of the object
     """
-    return json.dumps(obj, default=default_serialization)
+    # Like json.dumps, non-string dict keys are converted rather than rejected mid-stream
+    return orjson.dumps(obj, default=default_serialization, option=orjson.OPT_NON_STR_KEYS)
 
 
 def dumpd(obj: Any) -> Any:  # noqa: ANN401
@@ -98,4 +108,4 @@ def dumpd(obj: Any) -> Any:  # noqa: ANN401
     Returns:
         Dict/list representation of the object that can be JSON serialized
     """
-    return json.loads(dumps(obj))
+    return orjson.loads(dumps(obj))
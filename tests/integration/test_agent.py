@@ -1,6 +1,6 @@
 """Integration test for the agent stream functionality."""  # noqa: INP001
 
-from ibis_crew_ai.agent import agent_workflow
+from ibis_crew_ai.agent import get_agent
 
 
 def test_agent_stream() -> None:
@@ -14,8 +14,7 @@ def test_agent_stream() -> None:
                                 'content': 'Hi there!'},
                                {'type': 'human',
                                 'content': 'Write a fibonacci function in python'}]}
-    agent = agent_workflow()
-    events = [message for message, _ in agent.stream(input_dict, stream_mode='messages')]
+    events = [message for message, _ in get_agent().stream(input_dict, stream_mode='messages')]
     # Verify we get a reasonable number of messages
     assert len(events) > 0, 'Expected at least one message'
 
@@ -0,0 +1,111 @@
+"""Unit tests for the local chat message history of the Streamlit frontend."""  # noqa: INP001
+
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+import yaml
+from frontend.utils import local_chat_history
+from frontend.utils.local_chat_history import LocalChatMessageHistory
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> LocalChatMessageHistory:
+    """Create a chat history stored under a temporary directory."""
+    return LocalChatMessageHistory(user_id='test-user', session_id='session-1', base_dir=str(tmp_path))
+
+
+def _write_legacy_session(history: LocalChatMessageHistory, session_id: str, session: dict) -> None:
+    """Write a session in the YAML format used before the switch to JSON."""
+    (history.user_dir / f'{session_id}.yaml').write_text(yaml.dump([session], allow_unicode=True))
+
+
+def test_upsert_session_round_trip(history: LocalChatMessageHistory) -> None:
+    """Test that a saved session is read back unchanged, with its update time."""
+    session = {'title': 'Greeting', 'messages': [{'type': 'human', 'content': 'Héllo'}]}
+    history.upsert_session(session)
+
+    assert history.session_file == history.user_dir / 'session-1.json'
+    assert history.get_all_conversations() == {'session-1': session}
+    assert 'update_time' in session
+
+
+def test_get_all_conversations_reads_legacy_yaml(history: LocalChatMessageHistory) -> None:
+    """Test that sessions saved as YAML are still loaded, titled by file name when they have no title."""
+    _write_legacy_session(history, 'old', {'messages': [{'type': 'human', 'content': 'hi'}]})
+
+    assert history.get_all_conversations() == {'old': {'title': 'old.yaml',
+                                                       'messages': [{'type': 'human', 'content': 'hi'}]}}
+
+
+def test_get_all_conversations_prefers_json_copy(history: LocalChatMessageHistory) -> None:
+    """Test that a JSON session takes precedence over a legacy YAML copy of the same session."""
+    _write_legacy_session(history, 'session-1', {'title': 'Legacy', 'messages': []})
+    history.upsert_session({'title': 'Current', 'messages': []})
+
+    conversations = history.get_all_conversations()
+
+    assert list(conversations) == ['session-1']
+    assert conversations['session-1']['title'] == 'Current'
+
+
+def test_get_all_conversations_orders_by_update_time(history: LocalChatMessageHistory) -> None:
+    """Test that conversations are ordered by their stored update time, not by when their files were written."""
+    _write_legacy_session(history, 'newer', {'title': 'Newer', 'messages': [], 'update_time': '2024-02-01T00:00:00'})
+    _write_legacy_session(history, 'older', {'title': 'Older', 'messages': [], 'update_time': '2024-01-01T00:00:00'})
+
+    assert list(history.get_all_conversations()) == ['older', 'newer']
+
+
+def test_clear_removes_json_and_legacy_files(history: LocalChatMessageHistory) -> None:
+    """Test that clearing a session deletes both its JSON file and its legacy YAML copy."""
+    _write_legacy_session(history, 'session-1', {'title': 'Legacy', 'messages': []})
+    history.upsert_session({'title': 'Current', 'messages': []})
+
+    history.clear()
+
+    assert list(history.user_dir.iterdir()) == []
+
+
+def test_set_title_shares_concurrent_generation(history: LocalChatMessageHistory) -> None:
+    """Test that a second title request for the same session waits for the first instead of calling the LLM."""
+    generating = threading.Event()
+    release = threading.Event()
+    waiter_arrived = threading.Event()
+
+    def invoke(messages: list[dict]) -> Any:  # noqa: ANN401, ARG001
+        generating.set()
+        release.wait(timeout=5)
+        return MagicMock(content=' Generated title ')
+
+    title_chain = MagicMock()
+    title_chain.invoke.side_effect = invoke
+    first = {'messages': [{'type': 'human', 'content': 'hi'}]}
+    second = {'messages': [{'type': 'human', 'content': 'hi'}]}
+
+    with patch.object(local_chat_history, 'get_title_chain', return_value=title_chain):
+        first_call = threading.Thread(target=history.set_title, args=(first,))
+        first_call.start()
+        assert generating.wait(timeout=5)
+
+        # Flag when the second call starts waiting on the generation in flight, then let the first one finish
+        in_flight = local_chat_history._titles_in_flight[history.session_file]  # noqa: SLF001
+        wait = in_flight.wait
+
+        def flagged_wait(*args: Any, **kwargs: Any) -> bool:  # noqa: ANN401
+            waiter_arrived.set()
+            return wait(*args, **kwargs)
+
+        in_flight.wait = flagged_wait
+        second_call = threading.Thread(target=history.set_title, args=(second,))
+        second_call.start()
+        assert waiter_arrived.wait(timeout=5)
+        release.set()
+        first_call.join(timeout=5)
+        second_call.join(timeout=5)
+
+    title_chain.invoke.assert_called_once()
+    assert first['title'] == second['title'] == 'Generated title'
+    assert history.get_all_conversations()['session-1']['title'] == 'Generated title'
@@ -1,30 +1,36 @@
 """Unit tests for the FastAPI server endpoints."""  # noqa: INP001
 
 import os
-import sys
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from types import ModuleType
+from typing import Any
 from unittest.mock import MagicMock, patch
 
+import httpx
+import orjson
 import pytest
 from fastapi.testclient import TestClient
-from google.auth.credentials import Credentials
 from ibis_crew_ai.utils.typing import InputChat
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 
+# Validated once at import; the tests only read the sample chat, so every test can share it
+_SAMPLE_HUMAN = HumanMessage(content='What is the meaning of life?')
+_SAMPLE_INPUT_CHAT = InputChat(messages=[_SAMPLE_HUMAN])
 
-@pytest.fixture(autouse=True)
+
+@pytest.fixture(scope='session', autouse=True)
 def mock_google_cloud_credentials() -> Generator[None, None, None]:
-    """Mock Google Cloud credentials for testing."""
+    """Mock Google Cloud credentials for testing, once for the whole session."""
     with patch.dict(os.environ,
                     {'GOOGLE_APPLICATION_CREDENTIALS': '/path/to/mock/credentials.json',
                      'GOOGLE_CLOUD_PROJECT_ID': 'mock-project-id'}):
         yield
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope='session', autouse=True)
 def mock_google_auth_default() -> Generator[None, None, None]:
-    """Mock the google.auth.default function for testing."""
-    mock_credentials = MagicMock(spec=Credentials)
+    """Mock the google.auth.default function for testing, once for the whole session."""
+    mock_credentials = MagicMock()
     mock_project = 'mock-project-id'
 
     with patch('google.auth.default', return_value=(mock_credentials, mock_project)):
@@ -33,19 +39,101 @@ def mock_google_auth_default() -> Generator[None, None, None]:
 
 @pytest.fixture
 def sample_input_chat() -> InputChat:
-    """Fixture to create a sample input chat for testing."""
-    return InputChat(messages=[HumanMessage(content='What is the meaning of life?')])
+    """Fixture providing the shared sample input chat for testing."""
+    return _SAMPLE_INPUT_CHAT
+
+
+@pytest.fixture(scope='session')
+def server(mock_google_auth_default: None) -> ModuleType:  # noqa: ARG001
+    """Import the server module once for the session."""
+    # Imported here rather than at the top, so Google auth is already mocked when server sets up Cloud Logging
+    from ibis_crew_ai import server  # noqa: PLC0415
+
+    return server
+
 
+@pytest.fixture(scope='session')
+def client(server: ModuleType) -> TestClient:
+    """Create one TestClient for the server app, shared by all tests in the session.
 
-def test_redirect_root_to_docs() -> None:
+    The lifespan is not entered, so the tests do not start the background warm-up of the language model.
+    """
+    return TestClient(server.app)
+
+
+def test_redirect_root_to_docs(client: TestClient) -> None:
     """Test that the root endpoint (/) redirects to the Swagger UI documentation."""
-    # Mock the agent module before importing server
+    response = client.get('/')
+    assert response.status_code == 200  # noqa: PLR2004
+    assert 'Swagger UI' in response.text
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_events(server: ModuleType, sample_input_chat: InputChat) -> None:
+    """Test the chat stream functionality."""
+    input_data = {'input': sample_input_chat.model_dump(),
+                  'config': {'metadata': {'user_id': 'test-user', 'session_id': 'test-session', 'source': 'test'}}}
+    astream_configs = []
+
+    async def mock_astream(*args: Any, **kwargs: Any) -> AsyncGenerator[tuple[AIMessageChunk, dict], None]:  # noqa: ANN401, ARG001
+        astream_configs.append(kwargs['config'])
+        for content in ('Hello', ' world'):
+            yield AIMessageChunk(content=content), {}
+
     mock_agent = MagicMock()
-    with patch.dict(sys.modules, {'app.agent': mock_agent}):
-        # Now import server after the mock is in place
-        from ibis_crew_ai.server import app
-
-        client = TestClient(app)
-        response = client.get('/')
-        assert response.status_code == 200  # noqa: PLR2004
-        assert 'Swagger UI' in response.text
+    mock_agent.astream = mock_astream
+
+    # The ASGI transport drives the app on the test's own event loop instead of a TestClient worker thread
+    with patch.object(server, 'get_agent', return_value=mock_agent):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url='http://test') as client:
+            response = await client.post('/stream_messages', json=input_data)
+
+    # The body is fully buffered by now, so it is split once instead of iterated line by line
+    events = [orjson.loads(line) for line in response.content.splitlines() if line]
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [message['kwargs']['content'] for message, _ in events] == ['Hello', ' world']
+    # The user and session ids are tracing properties only, so they do not reach the run metadata
+    assert astream_configs[0]['metadata'] == {'source': 'test'}
+
+
+@pytest.mark.parametrize(('config', 'session_label'),
+                         [({'metadata': {'user_id': 'test-user', 'session_id': 'test-session'}}, 'test-session'),
+                          (None, 'unknown')])
+def test_stream_chat_events_logs_session_label(server: ModuleType,
+                                               client: TestClient,
+                                               sample_input_chat: InputChat,
+                                               config: dict | None,
+                                               session_label: str) -> None:
+    """Test that the streaming request is logged with the session id from the config metadata as a label."""
+    input_data = {'input': sample_input_chat.model_dump(), 'config': config}
+    with patch.object(server, 'logger') as mock_logger, \
+         patch.object(server, 'stream_messages', return_value=iter([])):
+        response = client.post('/stream_messages', json=input_data)
+
+    assert response.status_code == 200  # noqa: PLR2004
+    mock_logger.bind.assert_called_once_with(session_id=session_label)
+    mock_logger.bind.return_value.info.assert_called_once_with('Streaming chat events')
+
+
+def test_initialize_telemetry_disables_traceloop_metrics(server: ModuleType, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that Traceloop is set up to export spans only, without its metrics or logs exporters."""
+    monkeypatch.setattr(server, '_traceloop_ready', False)
+    monkeypatch.delenv('TRACELOOP_METRICS_ENABLED', raising=False)
+    monkeypatch.delenv('TRACELOOP_LOGGING_ENABLED', raising=False)
+    # patch.dict restores the environment, including the defaults initialize_telemetry sets
+    with patch.dict(os.environ), \
+         patch('traceloop.sdk.TracerWrapper') as mock_tracer_wrapper, \
+         patch('traceloop.sdk.MetricsWrapper') as mock_metrics_wrapper, \
+         patch('traceloop.sdk.LoggerWrapper') as mock_logger_wrapper, \
+         patch('traceloop.sdk.Telemetry'), \
+         patch.object(server, 'BatchSpanProcessor') as mock_processor, \
+         patch.object(server, 'CloudTraceLoggingSpanExporter'):
+        server.initialize_telemetry()
+
+    assert server._traceloop_ready  # noqa: SLF001
+    assert mock_tracer_wrapper.call_args.kwargs['processor'] is mock_processor.return_value
+    mock_metrics_wrapper.assert_not_called()
+    mock_metrics_wrapper.set_static_params.assert_not_called()
+    mock_logger_wrapper.assert_not_called()
@@ -0,0 +1,53 @@
+"""Unit tests for the chat actions of the Streamlit sidebar."""  # noqa: INP001
+
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from frontend.side_bar import EMPTY_CHAT_NAME, SideBar
+
+
+class _SessionState(dict):
+    """Dictionary that also allows attribute access, like Streamlit's session_state."""
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        self[name] = value
+
+
+@pytest.fixture
+def side_bar() -> SideBar:
+    """Create a SideBar whose session has chats but no chat order yet, as after a code reload."""
+    st = MagicMock()
+    st.session_state = _SessionState(session_id='b',
+                                     run_id='run',
+                                     session_db=MagicMock(),
+                                     user_chats={'a': {'title': 'A', 'messages': []},
+                                                 'b': {'title': 'B', 'messages': [{'type': 'human'}]}})
+    return SideBar(st)
+
+
+def test_create_new_chat_without_chat_order(side_bar: SideBar) -> None:
+    """Test that a new chat is added to the chat order exactly once."""
+    side_bar._create_new_chat()  # noqa: SLF001
+    ss = side_bar.st.session_state
+    new_sid = ss['session_id']
+    assert list(ss['chat_order']) == ['a', 'b', new_sid]
+    assert ss.user_chats[new_sid] == {'title': EMPTY_CHAT_NAME, 'messages': []}
+    assert ss.run_id is None
+
+
+def test_delete_chat_without_chat_order(side_bar: SideBar) -> None:
+    """Test that deleting a chat also removes it from the chat order."""
+    side_bar._delete_chat()  # noqa: SLF001
+    ss = side_bar.st.session_state
+    assert list(ss['chat_order']) == ['a']
+    assert list(ss.user_chats) == ['a']
+    assert ss['session_id'] == 'a'
+    ss.session_db.clear.assert_called_once_with()
+    ss.session_db.get_session.assert_called_once_with(session_id='a')
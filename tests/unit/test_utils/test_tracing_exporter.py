@@ -2,36 +2,46 @@
 
 from collections.abc import Generator
 from typing import Any
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
+import orjson
 import pytest
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import logging as google_cloud_logging
-from google.cloud import storage
+from google.cloud.logging_v2 import _gapic
+from ibis_crew_ai.utils import tracing
 from ibis_crew_ai.utils.tracing import CloudTraceLoggingSpanExporter
+from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
 from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.trace import SpanContext
+
+# Serialized attribute payloads on either side of the exporter's 255 KiB limit
+_SMALL_PAYLOAD = b'a' * 100
+_LARGE_PAYLOAD = b'a' * (400 * 1024 + 1)
 
 
 @pytest.fixture
-def mock_logging_client() -> Mock:
-    """Create a mock logging client."""
-    return Mock(spec=google_cloud_logging.Client)
+def mock_logging_client() -> MagicMock:
+    """Create a mock logging client whose loggers support the batch context manager."""
+    return MagicMock()
 
 
 @pytest.fixture
 def mock_storage_client() -> Mock:
     """Create a mock storage client."""
-    return Mock(spec=storage.Client)
+    return Mock()
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def mock_credentials() -> Any:  # noqa: ANN401
     """Create mock credentials."""
     return Mock()
 
 
-@pytest.fixture
+@pytest.fixture(scope='session', autouse=True)
 def patch_auth(mock_credentials: Any) -> Generator[Mock, None, None]:  # noqa: ANN401
-    """Patch the google.auth.default function."""
+    """Patch the google.auth.default function once for the whole session."""
     with patch(
         'google.auth.default', return_value=(mock_credentials, 'project'),
     ) as mock_auth:
@@ -63,47 +73,147 @@ def test_init(exporter: CloudTraceLoggingSpanExporter) -> None:
     assert exporter.debug is False
 
 
+@pytest.mark.usefixtures('patch_clients')
+def test_clients_created_lazily(mock_logging_client: Mock, mock_storage_client: Mock) -> None:
+    """Test that the Cloud clients are only used once the exporter needs them."""
+    exporter = CloudTraceLoggingSpanExporter(project_id='test-project', bucket_name='test-bucket')
+    mock_storage_client.bucket.assert_not_called()
+    mock_logging_client.logger.assert_not_called()
+    assert exporter.bucket is mock_storage_client.bucket.return_value
+    assert exporter.logger is mock_logging_client.logger.return_value
+    mock_storage_client.bucket.assert_called_once_with('test-bucket')
+
+
 def test_store_in_gcs(exporter: CloudTraceLoggingSpanExporter) -> None:
     """Test the store_in_gcs method of CloudTraceLoggingSpanExporter."""
     span_id = 'test-span-id'
-    content = 'test-content'
+    content = b'test-content'
     uri = exporter.store_in_gcs(content, span_id)
     assert uri == f'gs://test-bucket/spans/{span_id}.json'
     exporter.bucket.blob.assert_called_once_with(f'spans/{span_id}.json')
-
-
-@patch('json.dumps')
-def test_process_large_attributes_small_payload(mock_json_dumps: Mock,
-                                                exporter: CloudTraceLoggingSpanExporter) -> None:
-    """Test processing of small payload attributes."""
-    mock_json_dumps.return_value = 'a' * 100  # Small payload
+    upload_from_file = exporter.bucket.blob.return_value.upload_from_file
+    upload_from_file.assert_called_once()
+    assert upload_from_file.call_args.args[0].getvalue() == content
+    assert upload_from_file.call_args.kwargs['size'] == len(content)
+
+
+def test_store_in_gcs_checks_bucket_once(exporter: CloudTraceLoggingSpanExporter) -> None:
+    """Test that store_in_gcs checks the bucket existence only once."""
+    exporter.bucket.exists.return_value = False
+    assert exporter.store_in_gcs(b'test-content', 'span-1') == 'GCS bucket not found'
+    assert exporter.store_in_gcs(b'test-content', 'span-2') == 'GCS bucket not found'
+    exporter.bucket.exists.assert_called_once_with()
+    exporter.bucket.blob.assert_not_called()
+
+
+@pytest.mark.parametrize(('payload', 'expect_uri'), [(_SMALL_PAYLOAD, False), (_LARGE_PAYLOAD, True)])
+def test_process_large_attributes(payload: bytes,
+                                  expect_uri: bool,  # noqa: FBT001
+                                  exporter: CloudTraceLoggingSpanExporter) -> None:
+    """Test that only attributes above the size limit are moved to GCS."""
     span_dict = {'attributes': {'key': 'value'}}
-    result = exporter._process_large_attributes(span_dict, 'span-id')  # noqa: SLF001
-    assert result == span_dict
-
-
-@patch('json.dumps')
-def test_process_large_attributes_large_payload(mock_json_dumps: Mock,
-                                                exporter: CloudTraceLoggingSpanExporter) -> None:
-    """Test processing of large payload attributes."""
-    mock_json_dumps.return_value = 'a' * (400 * 1024 + 1)  # Large payload
-    span_dict = {'attributes': {'key1': 'value1'}}
-    result = exporter._process_large_attributes(span_dict, 'span-id')  # noqa: SLF001
-    assert 'uri_payload' in result['attributes']
-    assert 'url_payload' in result['attributes']
-
-
+    # Only the exporter module's reference to orjson is replaced, so nothing else serializing meanwhile sees the mock
+    with patch('ibis_crew_ai.utils.tracing.orjson') as mock_orjson:
+        mock_orjson_dumps = mock_orjson.dumps
+        mock_orjson_dumps.return_value = payload
+        result, attributes_size = exporter._process_large_attributes(span_dict, 'span-id')  # noqa: SLF001
+    mock_orjson_dumps.assert_called_once()
+    assert attributes_size == len(payload)
+    upload_from_file = exporter.bucket.blob.return_value.upload_from_file
+    if expect_uri:
+        assert 'uri_payload' in result['attributes']
+        assert 'url_payload' in result['attributes']
+        upload_from_file.assert_called_once()
+        assert upload_from_file.call_args.args[0].getvalue() == payload
+    else:
+        assert result == {'attributes': {'key': 'value'}}
+        upload_from_file.assert_not_called()
+
+
+@patch.object(CloudTraceSpanExporter, 'export', return_value=SpanExportResult.SUCCESS)
 @patch.object(CloudTraceLoggingSpanExporter, '_process_large_attributes')
-def test_export(mock_process_large_attributes: Mock, exporter: CloudTraceLoggingSpanExporter) -> None:
+def test_export(mock_process_large_attributes: Mock,
+                mock_trace_export: Mock,
+                exporter: CloudTraceLoggingSpanExporter) -> None:
     """Test the export method of CloudTraceLoggingSpanExporter."""
-    mock_span = Mock(spec=ReadableSpan)
-    mock_span.get_span_context.return_value.trace_id = 123
-    mock_span.get_span_context.return_value.span_id = 456
-    mock_span.to_json.return_value = '{"key": "value"}'
+    span = ReadableSpan(name='test-span',
+                        context=SpanContext(trace_id=123, span_id=456, is_remote=False),
+                        attributes={'key': 'value'})
 
-    mock_process_large_attributes.return_value = {'processed': 'data'}
+    mock_process_large_attributes.return_value = ({'processed': 'data'}, 100)
 
-    exporter.export([mock_span])
+    assert exporter.export([span]) == SpanExportResult.SUCCESS
 
     mock_process_large_attributes.assert_called_once()
-    exporter.logger.log_struct.assert_called_once()
+    span_dict = mock_process_large_attributes.call_args.kwargs['span_dict']
+    assert span_dict['name'] == 'test-span'
+    assert span_dict['attributes'] == {'key': 'value'}
+    assert span_dict['trace'] == 'projects/test-project/traces/7b'
+    assert span_dict['span_id'] == '1c8'
+    exporter.logger.batch.assert_called_once_with()
+    exporter.logger.batch.return_value.__enter__.return_value.log_struct.assert_called_once_with({'processed': 'data'},
+                                                                                                  severity='INFO')
+    exporter.logger.log_struct.assert_not_called()
+    mock_trace_export.assert_called_once_with([span])
+
+
+@patch.object(CloudTraceSpanExporter, 'export', return_value=SpanExportResult.SUCCESS)
+def test_export_splits_logs_and_survives_failed_writes(mock_trace_export: Mock,
+                                                       exporter: CloudTraceLoggingSpanExporter,
+                                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that span logs are written in size-bounded batches and a failed write does not stop the export."""
+    spans = [ReadableSpan(name=f'span-{i}',
+                          context=SpanContext(trace_id=123, span_id=i + 1, is_remote=False),
+                          attributes={'payload': 'a' * 1000})
+             for i in range(3)]
+    # Room for two of the spans per Cloud Logging call, each estimated from its attribute bytes
+    entry_size = len(orjson.dumps({'payload': 'a' * 1000})) + tracing._SPAN_LOG_ENTRY_OVERHEAD  # noqa: SLF001
+    monkeypatch.setattr(tracing, '_MAX_LOG_BATCH_BYTES', 2 * entry_size)
+    batch = exporter.logger.batch.return_value
+    # Not only API errors: an invalid entry fails the write with a ValueError before anything is sent
+    batch.__exit__.side_effect = [ValueError('Invalid log entry'), None]
+
+    assert exporter.export(spans) == SpanExportResult.SUCCESS
+
+    assert exporter.logger.batch.call_count == 2  # noqa: PLR2004
+    assert batch.__enter__.return_value.log_struct.call_count == 3  # noqa: PLR2004
+    mock_trace_export.assert_called_once_with(spans)
+
+
+@patch.object(CloudTraceSpanExporter, 'export', return_value=SpanExportResult.SUCCESS)
+def test_export_sequence_attributes_through_cloud_logging(mock_trace_export: Mock,
+                                                          mock_storage_client: Mock) -> None:
+    """Test that sequence attributes, which OpenTelemetry stores as tuples, pass Cloud Logging's entry conversion."""
+    logging_client = google_cloud_logging.Client(project='test-project',
+                                                 credentials=AnonymousCredentials(),
+                                                 _use_grpc=True)
+    # The real gRPC logging API converts the entries to protobuf; only the network call is mocked
+    gapic_api = MagicMock()
+    logging_client._logging_api = _gapic._LoggingAPI(gapic_api, logging_client)  # noqa: SLF001
+    exporter = CloudTraceLoggingSpanExporter(project_id='test-project',
+                                             logging_client=logging_client,
+                                             storage_client=mock_storage_client,
+                                             bucket_name='test-bucket')
+    span = ReadableSpan(name='test-span',
+                        context=SpanContext(trace_id=123, span_id=456, is_remote=False),
+                        attributes={'tags': ('a', 'b')})
+
+    assert exporter.export([span]) == SpanExportResult.SUCCESS
+
+    request = gapic_api.write_log_entries.call_args.kwargs['request']
+    assert list(request.entries[0].json_payload['attributes']['tags']) == ['a', 'b']
+    mock_trace_export.assert_called_once_with([span])
+
+
+@patch.object(CloudTraceSpanExporter, 'export', return_value=SpanExportResult.SUCCESS)
+@patch.object(CloudTraceLoggingSpanExporter, '_process_large_attributes', side_effect=RuntimeError('unexpected'))
+def test_export_to_cloud_trace_when_logging_fails(mock_process_large_attributes: Mock,  # noqa: ARG001
+                                                  mock_trace_export: Mock,
+                                                  exporter: CloudTraceLoggingSpanExporter) -> None:
+    """Test that the spans still reach Cloud Trace when building their log entries fails."""
+    span = ReadableSpan(name='test-span', context=SpanContext(trace_id=123, span_id=456, is_remote=False))
+
+    with pytest.raises(RuntimeError):
+        exporter.export([span])
+
+    mock_trace_export.assert_called_once_with([span])